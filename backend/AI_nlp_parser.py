@@ -1,10 +1,8 @@
-from openai import OpenAI
 from datetime import datetime
 import sys
 from logger import logger
 from typing import Optional, Dict
 import re
-sys.stdout.reconfigure(encoding='utf-8')
 
 #OPENAI API KEY 
 ###############
@@ -23,6 +21,17 @@ systemPrompt = [{"role": "system", "content": """
 #User Prompt
 message = {"role": "user", "content": "Hello" }
 
+# OpenAI client 在第一次解析时才建立，import 本模块不会连带初始化 SDK
+client = None
+
+def _get_client():
+    global client
+    if client is None:
+        from openai import OpenAI
+        sys.stdout.reconfigure(encoding='utf-8')
+        client = OpenAI()
+    return client
+
 def parse_schedule_from_text(text: str) -> Optional[Dict]:
     
     now = datetime.now()
@@ -30,7 +39,7 @@ def parse_schedule_from_text(text: str) -> Optional[Dict]:
     message["content"]= formatted +" , "+text
     conversation=systemPrompt.copy()
     conversation.append(message)
-    response = client.chat.completions.create(model=GPT_MODEL, messages=conversation, temperature=0) 
+    response = _get_client().chat.completions.create(model=GPT_MODEL, messages=conversation, temperature=0) 
     s = response.choices[0].message
     logger.info(f"[AINLP] raw AI text = {s!r}")
     
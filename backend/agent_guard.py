@@ -0,0 +1,164 @@
+# backend/agent_guard.py
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Tuple
+from logger import logger
+
+
+class AgentUnavailableError(Exception):
+    """Calendar agent 暂时不接受请求；retry_after 是建议的重试秒数。"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(AgentUnavailableError):
+    """熔断器打开，直接失败，不去启动浏览器。"""
+
+
+class AgentBusyError(AgentUnavailableError):
+    """排队已满（对应 HTTP 429）。"""
+
+
+class CircuitBreaker:
+    """
+    按最近 window 次调用的失败率熔断：
+    - 调用抛异常，或耗时超过 slow_call_seconds，都记为失败
+      （AgentGuard 会在 slow_call_seconds 时取消调用）
+    - 至少有 min_calls 次记录且失败率 >= failure_rate 时打开
+    - 打开 open_seconds 秒后进入半开，只放一个试探请求：
+      成功则关闭，失败则重新打开
+
+    每次状态切换 generation 加一。before_call 返回 (generation, is_trial)，
+    record 时带回来：熔断前就在跑的旧调用结果直接丢掉，
+    半开状态只由那一个试探请求决定。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 10, min_calls: int = 4, failure_rate: float = 0.5,
+                 slow_call_seconds: float = 60.0, open_seconds: float = 30.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self._results = deque(maxlen=window)  # True = 失败
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._generation = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: str):
+        self._state = state
+        self._generation += 1
+        self._trial_running = False
+
+    def retry_after(self) -> int:
+        remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def before_call(self) -> Tuple[int, bool]:
+        """调用前检查；熔断时抛 CircuitOpenError。返回交给 record 的 token。"""
+        state = self.state
+        if state == self.OPEN:
+            raise CircuitOpenError("calendar agent circuit open", self.retry_after())
+        if state == self.HALF_OPEN:
+            if self._trial_running:
+                raise CircuitOpenError("calendar agent circuit half-open", 1)
+            self._trial_running = True
+            return self._generation, True
+        return self._generation, False
+
+    def record(self, token: Tuple[int, bool], failed: bool, elapsed: float):
+        generation, is_trial = token
+        if generation != self._generation:
+            # 调用开始后状态已经切换过（例如跑到一半熔断了），结果不再有参考价值
+            logger.info("[GUARD] drop result from previous circuit generation")
+            return
+
+        failed = failed or elapsed >= self.slow_call_seconds
+        if is_trial:
+            if failed:
+                self._open()
+            else:
+                logger.info("[GUARD] circuit closed")
+                self._transition(self.CLOSED)
+                self._results.clear()
+            return
+
+        self._results.append(failed)
+        if len(self._results) >= self.min_calls:
+            rate = sum(self._results) / len(self._results)
+            if rate >= self.failure_rate:
+                self._open()
+
+    def _open(self):
+        logger.warning(f"[GUARD] circuit open for {self.open_seconds}s")
+        self._transition(self.OPEN)
+        self._opened_at = time.monotonic()
+        self._results.clear()
+
+
+class AgentGuard:
+    """
+    包在 calendar agent 外面：
+    - 熔断器打开时直接失败
+    - 同时最多 max_concurrency 个浏览器在跑，最多 max_queue 个在排队，
+      再多就抛 AgentBusyError
+    """
+
+    def __init__(self, breaker: CircuitBreaker, max_concurrency: int = 2, max_queue: int = 4):
+        self.breaker = breaker
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._avg_seconds = 10.0  # 单次调用耗时的滑动平均，用来估 Retry-After
+
+    def _estimate_wait(self) -> int:
+        rounds = (self._waiting + self.max_concurrency) / self.max_concurrency
+        return max(1, math.ceil(rounds * self._avg_seconds))
+
+    async def run(self, func, *args, **kwargs):
+        # 排队前先看熔断状态，打开时不必占用队列
+        if self.breaker.state == CircuitBreaker.OPEN:
+            raise CircuitOpenError("calendar agent circuit open", self.breaker.retry_after())
+        if self._waiting >= self.max_queue:
+            raise AgentBusyError("calendar agent queue full", self._estimate_wait())
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        try:
+            token = self.breaker.before_call()
+            t0 = time.monotonic()
+            try:
+                # 卡住的调用（Google 很慢 / 页面不响应）到时间就取消：
+                # 记为失败，也把并发名额让出来
+                result = await asyncio.wait_for(func(*args, **kwargs),
+                                                timeout=self.breaker.slow_call_seconds)
+            except BaseException:
+                # 包括被取消的情况，否则半开状态的试探名额会一直被占着
+                self.breaker.record(token, True, time.monotonic() - t0)
+                raise
+            elapsed = time.monotonic() - t0
+            self.breaker.record(token, False, elapsed)
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+            return result
+        finally:
+            self._semaphore.release()
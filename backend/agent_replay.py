@@ -0,0 +1,195 @@
+# backend/agent_replay.py
+"""
+calendar_agent 的录制 / 回放工具，用来离线 debug 和 benchmark：
+
+    cd backend
+    # 用真实 Google 登录跑一次，录下 HAR 和每一步的 HTML 快照
+    python agent_replay.py record recordings/meeting --date 2025-11-29 --start 10 --end 11 --title 开会
+
+    # 离线回放（不需要登录，请求全部由 HAR 提供），跑 5 次，输出每一步的耗时和请求数
+    python agent_replay.py replay recordings/meeting --runs 5
+
+录制内容包含日历数据和登录后的请求，不要提交到 git（默认放在 backend/recordings/）。
+
+录制目录结构：
+    meta.json        录制时的参数（日期、时间、标题）
+    calendar.har     Playwright 录下的网络请求
+    snapshots/       每一步结束时的 page.content()
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List
+from logger import logger
+
+# 由命令行设置；mode 为 None 时 calendar_agent 照常访问 Google
+replay_state = {
+    "mode": None,   # None / "record" / "replay"
+    "dir": None,
+}
+
+
+def har_path() -> str:
+    return os.path.join(replay_state["dir"], "calendar.har")
+
+
+def snapshot_dir() -> str:
+    return os.path.join(replay_state["dir"], "snapshots")
+
+
+class StepTracer:
+    """
+    记录 calendar_agent 每一步的耗时和网络请求数。
+    没启用时 step() 什么都不做，不影响正常运行。
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.steps: List[Dict] = []
+        self._requests = 0
+
+    def reset(self):
+        self.steps = []
+        self._requests = 0
+
+    @property
+    def request_count(self) -> int:
+        return self._requests
+
+    def attach(self, page):
+        if self.enabled:
+            page.on("request", self._on_request)
+
+    def _on_request(self, request):
+        self._requests += 1
+
+    @asynccontextmanager
+    async def step(self, page, name: str):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        requests_before = self._requests
+        try:
+            yield
+        finally:
+            self.steps.append({
+                "name": name,
+                "seconds": time.perf_counter() - t0,
+                "requests": self._requests - requests_before,
+            })
+            if replay_state["mode"] == "record":
+                await self._save_snapshot(page, name)
+
+    async def _save_snapshot(self, page, name: str):
+        os.makedirs(snapshot_dir(), exist_ok=True)
+        path = os.path.join(snapshot_dir(), f"{len(self.steps):02d}-{name}.html")
+        try:
+            html = await page.content()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        except Exception:
+            logger.warning(f"[REPLAY] snapshot failed: {name}", exc_info=True)
+
+
+tracer = StepTracer()
+
+
+async def _run_once(start: datetime, end: datetime, title: str):
+    # 放在函数里 import，calendar_agent 本身也会 import 这个模块。
+    # 直接调用不经过 agent_guard 的版本，避免连续失败时被熔断影响测量
+    from calendar_agent import _create_event_with_conflict_check, close_open_session
+
+    tracer.reset()
+    t0 = time.perf_counter()
+    try:
+        result = await _create_event_with_conflict_check(start, end, title)
+    except Exception as e:
+        result = repr(e)
+    finally:
+        await close_open_session()
+    total = time.perf_counter() - t0
+    return result, total, list(tracer.steps)
+
+
+def _print_report(runs: List[Dict]):
+    names: List[str] = []
+    for run in runs:
+        for step in run["steps"]:
+            if step["name"] not in names:
+                names.append(step["name"])
+
+    print(f"runs = {len(runs)}")
+    print(f"{'step':<16}{'median ms':>12}{'max ms':>12}{'requests':>12}")
+    for name in names:
+        secs = [s["seconds"] for r in runs for s in r["steps"] if s["name"] == name]
+        reqs = [s["requests"] for r in runs for s in r["steps"] if s["name"] == name]
+        print(f"{name:<16}{statistics.median(secs) * 1000:>12.1f}"
+              f"{max(secs) * 1000:>12.1f}{statistics.median(reqs):>12.0f}")
+    totals = [r["total"] for r in runs]
+    print(f"{'total':<16}{statistics.median(totals) * 1000:>12.1f}{max(totals) * 1000:>12.1f}")
+    print(f"result = {runs[-1]['result']!r}")
+
+
+async def _record(args):
+    os.makedirs(args.dir, exist_ok=True)
+    day = datetime.strptime(args.date, "%Y-%m-%d")
+    start = day.replace(hour=args.start)
+    end = day.replace(hour=args.end)
+    with open(os.path.join(args.dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"date": args.date, "start": args.start, "end": args.end, "title": args.title},
+                  f, ensure_ascii=False, indent=2)
+
+    result, total, steps = await _run_once(start, end, args.title)
+    _print_report([{"result": result, "total": total, "steps": steps}])
+
+
+async def _replay(args):
+    with open(os.path.join(args.dir, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    day = datetime.strptime(meta["date"], "%Y-%m-%d")
+    start = day.replace(hour=meta["start"])
+    end = day.replace(hour=meta["end"])
+
+    runs = []
+    for _ in range(args.runs):
+        result, total, steps = await _run_once(start, end, meta["title"])
+        runs.append({"result": result, "total": total, "steps": steps})
+    _print_report(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="calendar_agent 录制 / 回放")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    rec = sub.add_parser("record", help="用真实 Google Calendar 跑一次并录制")
+    rec.add_argument("dir")
+    rec.add_argument("--date", required=True, help="YYYY-MM-DD")
+    rec.add_argument("--start", type=int, required=True, help="开始小时 (24h)")
+    rec.add_argument("--end", type=int, required=True, help="结束小时 (24h)")
+    rec.add_argument("--title", required=True)
+
+    rep = sub.add_parser("replay", help="用录制好的 HAR 离线回放")
+    rep.add_argument("dir")
+    rep.add_argument("--runs", type=int, default=5)
+
+    args = parser.parse_args()
+    replay_state["mode"] = args.mode
+    replay_state["dir"] = os.path.abspath(args.dir)
+    tracer.enabled = True
+
+    if args.mode == "record":
+        asyncio.run(_record(args))
+    else:
+        asyncio.run(_replay(args))
+
+
+if __name__ == "__main__":
+    # 通过 import 调用，保证和 calendar_agent 用的是同一份 replay_state / tracer
+    from agent_replay import main as _main
+    _main()
@@ -1,14 +1,83 @@
 # backend/app.py
-from fastapi import FastAPI
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from voice_bot import handle_user_message, welcome_text
+from agent_guard import AgentBusyError, AgentUnavailableError
+from replies import (
+    FIXED_REPLIES, REPLY_KEYS, get_rendered, get_index, synthesize_audio, apply_audio,
+)
 from logger import logger
 
+# voice_bot 会连带 import calendar_agent (Playwright) 和 NLP parser，
+# 启动时不直接 import，而是放到后台线程预热，让 /api/welcome 和健康检查马上可用
+warmup_state = {
+    "task": None,
+    # 固定回复的离线语音单独一个 task，请求处理不会等它
+    "tts_task": None,
+    "components": {
+        "parser": False,
+        "calendar_agent": False,
+    },
+    "error": None,
+}
+
+
+def _load_voice_bot():
+    voice_bot = importlib.import_module("voice_bot")
+    warmup_state["components"]["parser"] = True
+    warmup_state["components"]["calendar_agent"] = True
+    return voice_bot
+
+
+async def _warm_up():
+    try:
+        await asyncio.to_thread(_load_voice_bot)
+        logger.info("[APP] warm-up finished")
+    except Exception as e:
+        warmup_state["error"] = repr(e)
+        logger.error("[APP] warm-up failed", exc_info=True)
+
+
+async def _pre_synthesize():
+    """固定回复的离线语音是可选的：不影响就绪状态，也不在请求路径上等待。"""
+    try:
+        results = await asyncio.to_thread(synthesize_audio)
+    except Exception:
+        logger.warning("[APP] tts pre-synthesis failed", exc_info=True)
+        return
+    # 回到事件循环里再更新缓存，避免和请求处理同时读写
+    apply_audio(results)
+
+
+async def _get_voice_bot():
+    """等待预热完成后返回 voice_bot 模块；预热失败时在这里重新 import，让错误直接抛出。"""
+    task = warmup_state["task"]
+    if task is not None:
+        await task
+    return _load_voice_bot()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_state["task"] = asyncio.create_task(_warm_up())
+    warmup_state["tts_task"] = asyncio.create_task(_pre_synthesize())
+    yield
+    for name in ("task", "tts_task"):
+        task = warmup_state[name]
+        if task is not None and not task.done():
+            task.cancel()
+
+
 app = FastAPI(
     title="Voice Calendar Assistant",
     description="语音驱动 Google Calendar 日程助手（FastAPI + Playwright）",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # 开发阶段允许本机前端访问
@@ -25,20 +94,83 @@ class Message(BaseModel):
 
 class BotReply(BaseModel):
     text: str
+    # 固定回复时带上 key，前端可以直接用缓存的语音
+    key: Optional[str] = None
+
+# 固定回复内容只会随部署改变，用 ETag 重新验证
+REPLY_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+# 语音 URL 带内容 hash，可以长期缓存
+AUDIO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _cached_response(request: Request, body: bytes, etag: str,
+                     media_type: str, cache_control: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
 
 @app.get("/api/welcome", response_model=BotReply)
-async def get_welcome():
-    logger.info("[HTTP] /api/welcome")
-    return BotReply(text=welcome_text)
+async def get_welcome(request: Request):
+    item = get_rendered("welcome")
+    return _cached_response(request, item["body"], item["etag"],
+                            "application/json", REPLY_CACHE_CONTROL)
+
+@app.get("/api/replies")
+async def get_replies(request: Request):
+    """所有固定回复（文字 + 预合成语音的 URL），前端启动时拿一次。"""
+    index = get_index()
+    return _cached_response(request, index["body"], index["etag"],
+                            "application/json", REPLY_CACHE_CONTROL)
+
+@app.get("/api/replies/{key}/audio")
+async def get_reply_audio(key: str, request: Request):
+    if key not in FIXED_REPLIES:
+        raise HTTPException(status_code=404, detail="unknown reply key")
+    item = get_rendered(key)
+    if item["audio"] is None:
+        raise HTTPException(status_code=404, detail="audio not available")
+    return _cached_response(request, item["audio"], item["audio_etag"],
+                            "audio/wav", AUDIO_CACHE_CONTROL)
+
+@app.get("/api/health")
+async def get_health():
+    """存活检查：进程起来就返回 200，不依赖预热。"""
+    return {"status": "ok"}
+
+@app.get("/api/ready")
+async def get_ready(response: Response):
+    """就绪检查：parser 和 calendar agent 都预热完才返回 200，否则 503。"""
+    components = dict(warmup_state["components"])
+    ready = all(components.values())
+    if not ready:
+        response.status_code = 503
+    return {
+        "ready": ready,
+        "components": components,
+        "error": warmup_state["error"],
+    }
 
 @app.post("/api/message", response_model=BotReply)
 async def post_message(msg: Message):
     logger.info(f"[HTTP] /api/message text={msg.text!r}")
     try:
-        reply = await handle_user_message(msg.text)
+        voice_bot = await _get_voice_bot()
+        reply = await voice_bot.handle_user_message(msg.text)
         logger.info(f"[HTTP] reply={reply!r}")
-        return BotReply(text=reply)
+        return BotReply(text=reply, key=REPLY_KEYS.get(reply))
+    except AgentUnavailableError as e:
+        # 排队满回 429，熔断回 503，都带 Retry-After
+        key = "busy" if isinstance(e, AgentBusyError) else "calendar_unavailable"
+        status = 429 if isinstance(e, AgentBusyError) else 503
+        logger.warning(f"[HTTP] /api/message rejected: {e} retry_after={e.retry_after}")
+        return JSONResponse(
+            status_code=status,
+            content={"text": FIXED_REPLIES[key], "key": key},
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error("[HTTP] /api/message error", exc_info=True)
         # 回傳一個穩定的錯誤訊息，前端會唸出來
-        return {"text": "在操作谷歌日历时发生错误，请稍后再试。"}
+        return BotReply(text=FIXED_REPLIES["calendar_error"], key="calendar_error")
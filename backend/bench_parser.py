@@ -0,0 +1,63 @@
+# backend/bench_parser.py
+"""
+parse_many 吞吐量 benchmark：
+
+    cd backend
+    python bench_parser.py [--n 1000000] [--workers 4]
+
+生成 n 条合成语句（日期 / 上下午 / 中文或数字小时 / 标题随机组合，
+约一成是解析不了的句子），分别用单进程和进程池跑 parse_many，输出每秒处理条数。
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime
+from nlp_parser import parse_many
+
+DAYS = ["今天", "明天", "后天"]
+PERIODS = ["", "上午", "下午", "晚上"]
+CN_HOURS = ["一", "二", "三", "四", "五", "六", "七", "八", "九", "十", "十一"]
+TITLES = ["和公司CEO会议", "打乒乓球", "看牙医", "给董事会做报告", "接孩子", "健身"]
+NOISE = ["你好呀", "帮我记一下", "明天再说吧", "今天天气不错"]
+
+
+def make_corpus(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        if rng.random() < 0.1:
+            corpus.append(rng.choice(NOISE))
+            continue
+        start = rng.randrange(1, 11)
+        h1 = CN_HOURS[start - 1] if rng.random() < 0.5 else str(start)
+        h2 = CN_HOURS[start] if rng.random() < 0.5 else str(start + 1)
+        corpus.append(f"{rng.choice(DAYS)} {rng.choice(PERIODS)}{h1}点到{h2}点，{rng.choice(TITLES)}。")
+    return corpus
+
+
+def _run(corpus, reference_time, workers):
+    t0 = time.perf_counter()
+    parsed = sum(1 for r in parse_many(corpus, reference_time, workers=workers) if r is not None)
+    elapsed = time.perf_counter() - t0
+    return parsed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="parse_many 吞吐量 benchmark")
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 数")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n)
+    reference_time = datetime(2025, 11, 28, 14, 0)
+    print(f"corpus = {len(corpus)} utterances")
+
+    pool_workers = args.workers or os.cpu_count() or 1
+    for label, workers in [("single process", 1), (f"{pool_workers} workers", pool_workers)]:
+        parsed, elapsed = _run(corpus, reference_time, workers)
+        print(f"{label:<16} parsed={parsed:>9}  {elapsed:8.2f} s  {len(corpus) / elapsed:12,.0f} strings/s")
+
+
+if __name__ == "__main__":
+    main()
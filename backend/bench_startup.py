@@ -0,0 +1,90 @@
+# backend/bench_startup.py
+"""
+启动时间 benchmark：
+
+    cd backend
+    python bench_startup.py [--runs 5] [--port 8765]
+
+每轮启动一个新的 uvicorn 进程，记录：
+  - import app 本身花的时间（单独子进程测）
+  - 从进程启动到 /api/welcome 第一次返回 200 的时间
+  - 从进程启动到 /api/health 第一次返回 200 的时间
+  - 从进程启动到 /api/ready 返回 200（预热完成）的时间
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _measure_import() -> float:
+    code = "import time; t=time.perf_counter(); import app; print(time.perf_counter()-t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _get_status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _measure_boot(port: int, timeout: float):
+    base = f"http://127.0.0.1:{port}"
+    pending = {"welcome": "/api/welcome", "health": "/api/health", "ready": "/api/ready"}
+    result = {}
+
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while pending and time.perf_counter() - t0 < timeout:
+            for name, path in list(pending.items()):
+                if _get_status(base + path) == 200:
+                    result[name] = time.perf_counter() - t0
+                    del pending[name]
+            time.sleep(0.005)
+    finally:
+        proc.terminate()
+        proc.wait()
+    for name in pending:
+        result[name] = float("nan")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI 启动时间 benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    imports = [_measure_import() for _ in range(args.runs)]
+    boots = [_measure_boot(args.port, args.timeout) for _ in range(args.runs)]
+
+    def ms(values):
+        return f"median={statistics.median(values) * 1000:8.1f} ms  max={max(values) * 1000:8.1f} ms"
+
+    print(f"runs = {args.runs}")
+    print(f"import app          {ms(imports)}")
+    for name in ["health", "welcome", "ready"]:
+        print(f"first 200 /{name:<8}  {ms([b[name] for b in boots])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,81 @@
 # backend/calendar_agent.py
+import asyncio
 import os
+import random
+import time
 from datetime import datetime
-from typing import Tuple
+from typing import Tuple, List, Optional
 from playwright.async_api import async_playwright
-from config import STORAGE_STATE_PATH
+from config import (
+    STORAGE_STATE_PATH, OPEN_SESSION_IDLE_SECONDS,
+    AGENT_MAX_CONCURRENCY, AGENT_MAX_QUEUE,
+    BREAKER_WINDOW, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATE,
+    BREAKER_SLOW_CALL_SECONDS, BREAKER_OPEN_SECONDS,
+    SCREENSHOT_MIN_INTERVAL, SCREENSHOT_SAMPLE_RATE,
+)
+from agent_guard import AgentGuard, CircuitBreaker
+from agent_replay import replay_state, tracer, har_path
 from re import compile as re_compile
 from logger import logger
 
 GOOGLE_CAL_URL = "https://calendar.google.com/calendar"
 
+# 遇到冲突时保留已打开的页面，用户选择建议时段后可直接在这个页面上建立日程
+# (p, browser, context, page)
+_open_session = None
+# 保留的页面闲置太久（用户没再回应）就自动关掉
+_idle_close_task = None
+# 保护 _open_session 的存取；页面本身只由取走它的请求使用
+_session_lock = asyncio.Lock()
+
+# 所有浏览器操作都经过这里：熔断 + 并发上限 + 排队上限
+agent_guard = AgentGuard(
+    CircuitBreaker(
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        failure_rate=BREAKER_FAILURE_RATE,
+        slow_call_seconds=BREAKER_SLOW_CALL_SECONDS,
+        open_seconds=BREAKER_OPEN_SECONDS,
+    ),
+    max_concurrency=AGENT_MAX_CONCURRENCY,
+    max_queue=AGENT_MAX_QUEUE,
+)
+
+# 上一次出错截图的时间，用于限制截图频率
+_last_screenshot_at = 0.0
+
+
+class CalendarAgentError(RuntimeError):
+    """操作 Google Calendar 失败（已记录日志 / 截图）。"""
+
+async def _get_replay_context_and_page(p):
+    """回放模式：不用登录，所有请求由录好的 HAR 提供，找不到的直接 abort。"""
+    logger.info(f"[CAL] replay from {har_path()}")
+    browser = await p.chromium.launch(headless=True)
+    context = await browser.new_context()
+    await context.route_from_har(har_path(), not_found="abort")
+    page = await context.new_page()
+    tracer.attach(page)
+    await page.goto(GOOGLE_CAL_URL)
+    return p, browser, context, page
+
+async def _new_context_and_page(browser, **context_kwargs):
+    """建立 context 和 page；录制模式下两种登录路径都要写 HAR、统计请求。"""
+    context = await browser.new_context(**context_kwargs)
+    if replay_state["mode"] == "record":
+        # 录制模式：正常访问，同时把所有请求/响应写进 HAR（context.close 时落盘）
+        logger.info(f"[CAL] recording HAR to {har_path()}")
+        await context.route_from_har(har_path(), update=True, update_content="embed")
+    page = await context.new_page()
+    tracer.attach(page)
+    return context, page
+
 async def _get_context_and_page():
     p = await async_playwright().start()
 
+    if replay_state["mode"] == "replay":
+        return await _get_replay_context_and_page(p)
+
     CHROME_PATH = r"C:\\Program Files\\Google\\Chrome\Application\\chrome.exe"
 
     browser = await p.chromium.launch(
@@ -28,8 +92,7 @@ async def _get_context_and_page():
 
     if not os.path.exists(STORAGE_STATE_PATH):
         # 首次登入
-        context = await browser.new_context()
-        page = await context.new_page()
+        context, page = await _new_context_and_page(browser)
         await page.goto(GOOGLE_CAL_URL)
         print("请在新打开的浏览器窗口中完成 Google 登录和多因子认证。")
         logger.info("[CAL] first login, please auth manually ...")
@@ -38,8 +101,7 @@ async def _get_context_and_page():
     else:
         # 復用登入狀態，不要再 launch 一次 browser
         logger.info("[CAL] reuse storage_state.json")
-        context = await browser.new_context(storage_state=STORAGE_STATE_PATH)
-        page = await context.new_page()
+        context, page = await _new_context_and_page(browser, storage_state=STORAGE_STATE_PATH)
         await page.goto(GOOGLE_CAL_URL)
 
     return p, browser, context, page
@@ -117,6 +179,67 @@ async def _has_conflict(page, start: datetime, end: datetime) -> Tuple[bool, str
 
     return False, ""
 
+# 事件卡片 aria-label 里的时间段，例如：
+#   "上午10點至上午11點，和公司CEO會議，..."
+#   "下午2:30 – 下午3:30，..."
+#   "14:00 到 15:00，..."
+_EVENT_RANGE_PATTERN = re_compile(
+    r'(上午|下午|晚上)?\s*(\d{1,2})(?:[:：](\d{2}))?\s*[點点时時]?\s*(?:至|到|-|–|~)\s*'
+    r'(上午|下午|晚上)?\s*(\d{1,2})(?:[:：](\d{2}))?'
+)
+
+
+def _to_24h(period: Optional[str], hour: int) -> int:
+    if period in ("下午", "晚上") and hour < 12:
+        return hour + 12
+    if period == "上午" and hour == 12:
+        return 0
+    return hour
+
+
+def parse_event_label_range(label: str, day: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """從事件卡片的 aria-label 解析出 (開始, 結束)，解析不到回傳 None。"""
+    if not label:
+        return None
+    m = _EVENT_RANGE_PATTERN.search(label)
+    if not m:
+        return None
+    p1, h1, m1, p2, h2, m2 = m.groups()
+    # 結束時間沒寫上午/下午時，沿用開始時間的
+    p2 = p2 or p1
+    try:
+        start = day.replace(hour=_to_24h(p1, int(h1)), minute=int(m1 or 0), second=0, microsecond=0)
+        end_hour = _to_24h(p2, int(h2))
+        if end_hour in (0, 24) and not int(m2 or 0):
+            # 結束在午夜（“下午11點至上午12點” / “23:00 到 24:00”），當作當天 23:59
+            end = day.replace(hour=23, minute=59, second=0, microsecond=0)
+        else:
+            end = day.replace(hour=end_hour, minute=int(m2 or 0), second=0, microsecond=0)
+    except ValueError:
+        return None
+    if end <= start:
+        return None
+    return start, end
+
+
+async def _scrape_busy_intervals(page, day: datetime) -> List[Tuple[datetime, datetime]]:
+    """
+    抓取 day view 上所有事件的時間段。
+    用一次 evaluate 把所有 aria-label 拿回來，避免逐個 locator 來回。
+    """
+    labels = await page.evaluate(
+        """() => Array.from(document.querySelectorAll("[role='button'][aria-label], [data-eventid]"))
+                .map(el => el.getAttribute('aria-label') || el.innerText || '')"""
+    )
+    busy = []
+    for label in labels:
+        rng = parse_event_label_range(label, day)
+        if rng is not None:
+            busy.append(rng)
+    logger.info(f"[CAL] scraped {len(busy)} busy intervals from {len(labels)} labels")
+    return busy
+
+
 async def debug_dialog_inputs(page):
     """列出對話框裡的 input 欄位，幫忙確認索引與 aria-label。"""
     dialog = page.get_by_role("dialog").first
@@ -292,6 +415,78 @@ async def _create_event(page, start: datetime, end: datetime, title: str):
     print("[calendar_agent] event creation flow finished (標題+儲存)")
 
 
+async def _maybe_screenshot(page):
+    """
+    出錯截圖幫助 debug，但要限頻 + 抽樣：
+    高負載時每個失敗都寫一張 full_page 截圖會拖慢整台機器。
+    """
+    global _last_screenshot_at
+    now = time.monotonic()
+    if now - _last_screenshot_at < SCREENSHOT_MIN_INTERVAL:
+        return
+    if random.random() >= SCREENSHOT_SAMPLE_RATE:
+        return
+    _last_screenshot_at = now
+    try:
+        await page.screenshot(path="calendar_error.png")
+        logger.info("[CAL] screenshot saved: calendar_error.png")
+    except Exception:
+        logger.warning("[CAL] screenshot failed", exc_info=True)
+
+
+async def _close_after_idle(seconds: float):
+    await asyncio.sleep(seconds)
+    logger.info(f"[CAL] open session idle for {seconds}s, closing")
+    await close_open_session()
+
+
+async def _close_session(session):
+    p, browser, context, page = session
+    try:
+        await context.close()
+        await browser.close()
+        await p.stop()
+    except Exception:
+        logger.warning("[CAL] close open session failed", exc_info=True)
+
+
+async def _take_open_session():
+    """
+    取走保留的頁面（之後由呼叫者負責關閉），並停止閒置計時。
+    取走後別的請求就碰不到它，同時有多個 agent 在跑時不會關掉正在用的頁面。
+    """
+    global _open_session, _idle_close_task
+    async with _session_lock:
+        if _idle_close_task is not None:
+            # 閒置計時本身呼叫到這裡時不能取消自己
+            if _idle_close_task is not asyncio.current_task():
+                _idle_close_task.cancel()
+            _idle_close_task = None
+        session = _open_session
+        _open_session = None
+        return session
+
+
+async def _keep_open_session(session):
+    """保留衝突時的頁面，並開始閒置計時；之前保留的頁面會被關掉。"""
+    global _open_session, _idle_close_task
+    async with _session_lock:
+        previous = _open_session
+        _open_session = session
+        if _idle_close_task is not None:
+            _idle_close_task.cancel()
+        _idle_close_task = asyncio.create_task(_close_after_idle(OPEN_SESSION_IDLE_SECONDS))
+    if previous is not None:
+        await _close_session(previous)
+
+
+async def close_open_session():
+    """關閉衝突時保留下來的瀏覽器（如果有）。"""
+    session = await _take_open_session()
+    if session is not None:
+        await _close_session(session)
+
+
 async def create_event_with_conflict_check(start: datetime, end: datetime, title: str):
     """
     对外暴露的主函数：
@@ -299,25 +494,90 @@ async def create_event_with_conflict_check(start: datetime, end: datetime, title
     - 跳到指定日期
     - 检查冲突
     - 创建日程或返回冲突信息
+
+    经过 agent_guard 调用：熔断时抛 CircuitOpenError，排队满时抛 AgentBusyError，
+    浏览器操作失败时抛 CalendarAgentError。
+    """
+    return await agent_guard.run(_create_event_with_conflict_check, start, end, title)
+
+
+async def create_event_on_open_page(start: datetime, end: datetime, title: str):
+    """
+    同上，经过 agent_guard 调用 _create_event_on_open_page。
+    返回值和 create_event_with_conflict_check 一样是 (created, conflict_info, busy)。
+    """
+    return await agent_guard.run(_create_event_on_open_page, start, end, title)
+
+
+async def _create_event_with_conflict_check(start: datetime, end: datetime, title: str):
+    """
+    返回 (created, conflict_info, busy)：
+    有冲突时 busy 是当天已抓到的日程时间段，页面会保留不关，
+    之后可以用 create_event_on_open_page 直接在同一页面建立日程。
     """
+    await close_open_session()
+    # 打开浏览器时还没有 page，不能用 tracer.step；
+    # 先记下请求数，打开首页时的请求也要算进这一步
+    t0 = time.perf_counter()
+    requests_before = tracer.request_count
     p, browser, context, page = await _get_context_and_page()
+    if tracer.enabled:
+        tracer.steps.append({
+            "name": "open_browser",
+            "seconds": time.perf_counter() - t0,
+            "requests": tracer.request_count - requests_before,
+        })
+    keep_open = False
     try:
-        await _goto_date(page, start)
-        has_conflict, conflict_info = await _has_conflict(page, start, end)
+        async with tracer.step(page, "goto_date"):
+            await _goto_date(page, start)
+        async with tracer.step(page, "has_conflict"):
+            has_conflict, conflict_info = await _has_conflict(page, start, end)
         if has_conflict:
-            return False, conflict_info
-        await _create_event(page, start, end, title)
-        return True, ""
-    except Exception:
+            try:
+                async with tracer.step(page, "scrape_busy"):
+                    busy = await _scrape_busy_intervals(page, start)
+            except Exception:
+                logger.warning("[CAL] scrape busy intervals failed", exc_info=True)
+                busy = []
+            await _keep_open_session((p, browser, context, page))
+            keep_open = True
+            return False, conflict_info, busy
+        async with tracer.step(page, "create_event"):
+            await _create_event(page, start, end, title)
+        return True, "", []
+    except Exception as e:
         logger.error("[CAL] create_event_with_conflict_check failed", exc_info=True)
-        # 截圖幫助 debug
-        try:
-            await page.screenshot(path="calendar_error.png", full_page=True)
-            logger.info("[CAL] screenshot saved: calendar_error.png")
-        except Exception:
-            logger.warning("[CAL] screenshot failed", exc_info=True)
-        return False, "操作日历时发生内部错误。"
+        await _maybe_screenshot(page)
+        # 往外抛，让熔断器记为失败
+        raise CalendarAgentError("操作日历时发生内部错误。") from e
     finally:
-        await context.close()
-        await browser.close()
-        await p.stop()
\ No newline at end of file
+        if not keep_open:
+            await context.close()
+            await browser.close()
+            await p.stop()
+
+
+async def _create_event_on_open_page(start: datetime, end: datetime, title: str):
+    """
+    在上一次衝突時保留的頁面上直接建立日程（不再重新開瀏覽器、不再檢查衝突，
+    因為時段是從當天空閒時間裡挑出來的）。
+    沒有保留的頁面時（例如閒置超時已關閉），退回完整流程，
+    這時仍可能遇到衝突，衝突資訊照樣回傳給呼叫者。
+    """
+    session = await _take_open_session()
+    if session is None:
+        return await _create_event_with_conflict_check(start, end, title)
+
+    page = session[3]
+    try:
+        if page.is_closed():
+            raise RuntimeError("open page already closed")
+        await _create_event(page, start, end, title)
+        return True, "", []
+    except Exception as e:
+        logger.error("[CAL] create_event_on_open_page failed", exc_info=True)
+        await _maybe_screenshot(page)
+        raise CalendarAgentError("操作日历时发生内部错误。") from e
+    finally:
+        await _close_session(session)
@@ -8,4 +8,28 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 STORAGE_STATE_PATH = os.path.join(BASE_DIR, "storage_state.json")
 
 # Google Calendar 的入口 URL
-GOOGLE_CAL_URL = "https://calendar.google.com/calendar"
\ No newline at end of file
+GOOGLE_CAL_URL = "https://calendar.google.com/calendar"
+
+# 欢迎语（放在这里，app 启动时不必 import voice_bot）
+WELCOME_TEXT = "您好，我是您的日程助手，你要记录什么日程？"
+
+# 冲突时建议空闲时段：工作时间（小时，24 小时制）与建议个数
+WORK_START_HOUR = 9
+WORK_END_HOUR = 18
+FREE_SLOT_SUGGESTIONS = 3
+# 冲突时保留的浏览器页面，闲置多久（秒）后自动关闭
+OPEN_SESSION_IDLE_SECONDS = 120
+
+
+# Calendar agent 熔断 / 限流
+AGENT_MAX_CONCURRENCY = 2       # 同时最多几个浏览器
+AGENT_MAX_QUEUE = 4             # 最多几个请求排队，超过回 429
+BREAKER_WINDOW = 10             # 统计最近几次调用
+BREAKER_MIN_CALLS = 4           # 至少几次调用才判断失败率
+BREAKER_FAILURE_RATE = 0.5      # 失败率达到多少就熔断
+BREAKER_SLOW_CALL_SECONDS = 60  # 超过这个耗时也算失败
+BREAKER_OPEN_SECONDS = 30       # 熔断多久后试探恢复
+
+# 出错截图：最短间隔（秒）和抽样比例，避免高负载时大量写盘
+SCREENSHOT_MIN_INTERVAL = 60
+SCREENSHOT_SAMPLE_RATE = 0.2
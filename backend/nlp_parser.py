@@ -1,7 +1,10 @@
 #nlp_parser.py
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, Iterator, List
 from logger import logger
 
 # 中文数字映射
@@ -93,6 +96,19 @@ def _parse_hour(word: str) -> Optional[int]:
     return _cn_hour_to_int(word)
 
 
+# 一個統一的正则：
+#   - 小时部分允许：中文数字 或 数字
+#   - “点/點/时/時/:” 都接受
+TIME_PATTERN = re.compile(
+    r'([零一二三四五六七八九十两兩〇0-9]{1,3})[点點:时時](?:\d{0,2})?到([零一二三四五六七八九十两兩〇0-9]{1,3})[点點时時]?',
+)
+
+# parse_many 超过这个数量才用多进程，小批量直接在本进程跑更快
+PARALLEL_THRESHOLD = 20000
+# 每个子进程任务处理多少条
+CHUNK_SIZE = 5000
+
+
 def parse_schedule_from_text(text: str) -> Optional[Dict]:
     """
     从中文语音文本中提取：
@@ -111,17 +127,22 @@ def parse_schedule_from_text(text: str) -> Optional[Dict]:
         }
         或 None（解析失败）
     """
+    return _parse(text, datetime.now(), verbose=True)
+
+
+def _parse(text: str, now: datetime, verbose: bool) -> Optional[Dict]:
+    """解析核心：now 由调用方给定；verbose=False 时不写日志（批量解析用）。"""
     if not text:
-        logger.warning("[NLP] empty text")
+        if verbose:
+            logger.warning("[NLP] empty text")
         return None
 
     raw = text
-    logger.info(f"[NLP] raw text = {raw!r}")
+    if verbose:
+        logger.info(f"[NLP] raw text = {raw!r}")
     # 去掉空格，语音识别经常会插入空格
     text = raw.replace(" ", "")
 
-    now = datetime.now()
-
     # === 1. 解析日期 ===
     if "今天" in text:
         base_date = now.date()
@@ -143,14 +164,7 @@ def parse_schedule_from_text(text: str) -> Optional[Dict]:
     end_hour: Optional[int] = None
     match_obj = None
 
-    # 一個統一的正则：
-    #   - 小时部分允许：中文数字 或 数字
-    #   - “点/點/时/時/:” 都接受
-    time_pattern = re.compile(
-        r'([零一二三四五六七八九十两兩〇0-9]{1,3})[点點:时時](?:\d{0,2})?到([零一二三四五六七八九十两兩〇0-9]{1,3})[点點时時]?',
-    )
-
-    m = time_pattern.search(text)
+    m = TIME_PATTERN.search(text)
     if m:
         h1 = _parse_hour(m.group(1))
         h2 = _parse_hour(m.group(2))
@@ -160,7 +174,8 @@ def parse_schedule_from_text(text: str) -> Optional[Dict]:
         match_obj = m
 
     if match_obj is None or start_hour is None or end_hour is None:
-        logger.warning(f"[NLP] fail to parse time range, text={text!r}")
+        if verbose:
+            logger.warning(f"[NLP] fail to parse time range, text={text!r}")
         # 没有识别到时间段
         return None
 
@@ -209,10 +224,11 @@ def parse_schedule_from_text(text: str) -> Optional[Dict]:
     if not title:
         title = "未命名日程"
 
-    logger.info(
-        f"[NLP] parsed: date={base_date}, "
-        f"start_hour={start_hour}, end_hour={end_hour}, title={title!r}"
-    )
+    if verbose:
+        logger.info(
+            f"[NLP] parsed: date={base_date}, "
+            f"start_hour={start_hour}, end_hour={end_hour}, title={title!r}"
+        )
 
 
     return {
@@ -220,3 +236,121 @@ def parse_schedule_from_text(text: str) -> Optional[Dict]:
         "end": end_dt,
         "title": title
     }
+
+
+def _parse_quiet(text: str, reference_time: datetime) -> Optional[Dict]:
+    """批量用：不写日志；像“下午十二点到…”这种算出非法时间的句子当作解析失败，不中断整批。"""
+    try:
+        return _parse(text, reference_time, verbose=False)
+    except ValueError:
+        return None
+
+
+def _parse_chunk(args) -> List[Optional[Dict]]:
+    """子进程里跑的一批（模块级函数，才能被 pickle）。"""
+    texts, reference_time = args
+    return [_parse_quiet(t, reference_time) for t in texts]
+
+
+def _chunks(texts: Iterable[str], reference_time: datetime, size: int):
+    chunk = []
+    for t in texts:
+        chunk.append(t)
+        if len(chunk) >= size:
+            yield chunk, reference_time
+            chunk = []
+    if chunk:
+        yield chunk, reference_time
+
+
+def parse_many(texts: Iterable[str], reference_time: Optional[datetime] = None,
+               workers: Optional[int] = None) -> Iterator[Optional[Dict]]:
+    """
+    批量解析，结果按输入顺序逐条 yield（和 parse_schedule_from_text 一样是 dict 或 None）。
+
+    - 所有句子共用同一个 reference_time（默认调用时的 datetime.now()），
+      “今天/明天”不会因为跑得久而跨日
+    - 不逐条写日志，结束时汇总写一条
+    - 输入超过 PARALLEL_THRESHOLD 条时分块交给进程池，边算边返回；
+      workers=1（或机器只有一个 CPU）时单进程
+    """
+    if reference_time is None:
+        reference_time = datetime.now()
+
+    total = 0
+    parsed = 0
+    try:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 1:
+            results = (_parse_quiet(t, reference_time) for t in texts)
+        else:
+            results = _parse_parallel(texts, reference_time, workers)
+        for r in results:
+            total += 1
+            if r is not None:
+                parsed += 1
+            yield r
+    finally:
+        logger.info(f"[NLP] parse_many: parsed {parsed}/{total}, reference_time={reference_time}")
+
+
+def _parse_parallel(texts: Iterable[str], reference_time: datetime,
+                    workers: int) -> Iterator[Optional[Dict]]:
+    chunks = _chunks(texts, reference_time, CHUNK_SIZE)
+
+    # 先看前几块：总量不大就不开进程池（启动进程比解析本身还贵）
+    head = []
+    head_count = 0  # 最后一块可能不满，按实际条数算
+    for chunk in chunks:
+        head.append(chunk)
+        head_count += len(chunk[0])
+        if head_count >= PARALLEL_THRESHOLD:
+            break
+    if head_count < PARALLEL_THRESHOLD:
+        for chunk in head:
+            yield from _parse_chunk(chunk)
+        return
+
+    def all_chunks():
+        yield from head
+        yield from chunks
+
+    # 不用 pool.map：它会一次把整个输入读完提交。
+    # 这里最多同时提交 workers*2 块，按顺序取回，内存占用和输入大小无关
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in all_chunks():
+            pending.append(pool.submit(_parse_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+SLOT_CHOICE_PATTERN = re.compile(
+    r'(?:我)?(?:就|选|選|要)?(?:选|選|要)?'
+    r'第([零一二三四五六七八九十两兩〇0-9]{1,3})[个個项項]?'
+    r'(?:吧|好了|就好|就行|啦)?[。．.!！,，]?'
+)
+
+
+def parse_slot_choice(text: str) -> Optional[int]:
+    """
+    解析用户对建议时段的选择，返回从 0 开始的索引：
+      - '第一个' / '第1个' -> 0
+      - '第二個。'        -> 1
+      - '就第一个吧'      -> 0
+    整句只能是“第N个”，前后可以带少量口语词（就/选/要 … 吧/好了），
+    像“明天第二节课十点到十一点”这种完整日程不算选择。
+    解析不到返回 None。
+    """
+    if not text:
+        return None
+    m = SLOT_CHOICE_PATTERN.fullmatch(text.replace(" ", ""))
+    if not m:
+        return None
+    n = _parse_hour(m.group(1).replace("兩", "两"))
+    if n is None or n < 1:
+        return None
+    return n - 1
@@ -0,0 +1,118 @@
+# backend/replies.py
+import hashlib
+import json
+import os
+from typing import Dict, Optional
+from config import BASE_DIR, WELCOME_TEXT
+from logger import logger
+
+# 固定回复（不含变量），可以预先渲染、缓存，前端也可以预先合成语音
+FIXED_REPLIES: Dict[str, str] = {
+    "welcome": WELCOME_TEXT,
+    "nlp_failed": "我没有听清楚具体的时间或标题，请再说一遍，例如：明天上午十点到十一点，和公司CEO会议。",
+    "calendar_error": "在操作谷歌日历时发生错误，请稍后再试。",
+    "busy": "现在请求太多，请稍等一下再说一次。",
+    "calendar_unavailable": "谷歌日历暂时无法访问，请稍后再试。",
+}
+
+# 反查：回复文字 -> key，用来在 /api/message 里标记固定回复
+REPLY_KEYS: Dict[str, str] = {text: key for key, text in FIXED_REPLIES.items()}
+
+TTS_CACHE_DIR = os.path.join(BASE_DIR, "tts_cache")
+
+# key -> {"text", "etag", "body", "audio", "audio_etag"}
+_rendered: Dict[str, Dict] = {}
+_index: Optional[Dict] = None
+
+
+def _etag(data: bytes) -> str:
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def _render_one(key: str) -> Dict:
+    text = FIXED_REPLIES[key]
+    body = json.dumps({"text": text, "key": key}, ensure_ascii=False).encode("utf-8")
+    return {"text": text, "etag": _etag(body), "body": body, "audio": None, "audio_etag": None}
+
+
+def get_rendered(key: str) -> Dict:
+    """返回预先渲染好的 JSON body 和 ETag（第一次调用时渲染）。"""
+    item = _rendered.get(key)
+    if item is None:
+        item = _rendered[key] = _render_one(key)
+    return item
+
+
+def audio_url(key: str) -> Optional[str]:
+    item = get_rendered(key)
+    if item["audio"] is None:
+        return None
+    # ETag 放进 URL，内容变了 URL 就变，可以当 immutable 缓存
+    return f"/api/replies/{key}/audio?v={item['audio_etag'].strip(chr(34))}"
+
+
+def get_index() -> Dict:
+    """所有固定回复的清单（JSON body + ETag），前端一次拿完。"""
+    global _index
+    if _index is None:
+        replies = {
+            key: {"text": get_rendered(key)["text"], "audio": audio_url(key)}
+            for key in FIXED_REPLIES
+        }
+        body = json.dumps({"replies": replies}, ensure_ascii=False).encode("utf-8")
+        _index = {"body": body, "etag": _etag(body)}
+    return _index
+
+
+def synthesize_audio() -> Dict[str, bytes]:
+    """
+    用本地离线 TTS 把固定回复预先合成成 wav，返回 key -> 音频内容。
+    文件名带文字的 hash，文字没变时直接用磁盘上的缓存。
+    没装 pyttsx3 或合成失败时跳过，前端会退回浏览器 TTS。
+
+    会在后台线程里跑，所以这里不碰 _rendered / _index，
+    结果交回事件循环用 apply_audio 套用。
+    """
+    try:
+        # 可选依赖，放在这里 import，app 启动时不必加载
+        import pyttsx3
+    except ImportError:
+        logger.info("[TTS] pyttsx3 not installed, skip pre-synthesis")
+        return {}
+
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    engine = None
+    results: Dict[str, bytes] = {}
+    for key, text in FIXED_REPLIES.items():
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(TTS_CACHE_DIR, f"{key}-{digest}.wav")
+        try:
+            if not os.path.exists(path):
+                if engine is None:
+                    engine = pyttsx3.init()
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+            with open(path, "rb") as f:
+                audio = f.read()
+        except Exception:
+            logger.warning(f"[TTS] synthesize failed: key={key}", exc_info=True)
+            continue
+        if audio:
+            results[key] = audio
+    return results
+
+
+def apply_audio(results: Dict[str, bytes]):
+    """
+    在事件循环里套用 synthesize_audio 的结果：
+    每个 key 换成一个完整的新 dict（audio 和 audio_etag 同时就位），再让清单重新渲染。
+    """
+    global _index
+    for key, audio in results.items():
+        item = dict(get_rendered(key))
+        item["audio"] = audio
+        item["audio_etag"] = _etag(audio)
+        _rendered[key] = item
+        logger.info(f"[TTS] cached audio: key={key}, bytes={len(audio)}")
+    # 清单里带了 audio URL，需要重新渲染
+    _index = None
@@ -0,0 +1,119 @@
+# backend/slot_finder.py
+import heapq
+from bisect import bisect_left
+from datetime import datetime, timedelta, date
+from typing import List, Tuple, Iterable, Iterator
+
+Interval = Tuple[datetime, datetime]
+
+
+def merge_intervals(busy: Iterable[Interval]) -> List[Interval]:
+    """
+    把忙碌时段排序并合并重叠 / 相接的部分。
+    结果按开始时间排序，彼此不重叠，可以直接做一次线性扫描。
+    """
+    merged: List[Interval] = []
+    for s, e in sorted(b for b in busy if b[1] > b[0]):
+        if merged and s <= merged[-1][1]:
+            if e > merged[-1][1]:
+                merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    return merged
+
+
+def _free_gaps(merged: List[Interval], starts: List[datetime],
+               win_start: datetime, win_end: datetime) -> Iterator[Interval]:
+    """在一个工作时段窗口内，扫描出所有空闲区间（merged 已排序合并）。"""
+    # 只需从第一个可能与窗口重叠的区间开始扫，不必从头遍历多日数据
+    i = max(bisect_left(starts, win_start) - 1, 0)
+    cursor = win_start
+    while i < len(merged) and merged[i][0] < win_end:
+        s, e = merged[i]
+        if e > cursor:
+            if s > cursor:
+                yield cursor, s
+            cursor = e
+        i += 1
+    if cursor < win_end:
+        yield cursor, win_end
+
+
+def _align_up(dt: datetime, step: timedelta) -> datetime:
+    """向上取整到 step 的整数倍（以当天 0 点为基准）。"""
+    midnight = datetime(dt.year, dt.month, dt.day)
+    steps = -(-(dt - midnight) // step)
+    return midnight + steps * step
+
+
+def find_free_slots(
+    busy: Iterable[Interval],
+    desired_start: datetime,
+    duration: timedelta,
+    count: int = 3,
+    work_start_hour: int = 9,
+    work_end_hour: int = 18,
+    days: int = 1,
+    step: timedelta = timedelta(minutes=30),
+) -> List[Interval]:
+    """
+    在已有日程（busy）之外，找出与 desired_start 最接近的 count 个可用时段。
+
+    - 只在每天 work_start_hour ~ work_end_hour 的工作时间内找
+    - 从 desired_start 当天起，共搜索 days 天
+    - 优先每个空闲区间给一个建议（区间里离 desired_start 最近的那个），
+      避免连续给出 10:00、10:30、11:00 这种几乎一样的选项；
+      空闲区间不够 count 个时，再从区间里补离 desired_start 最近、
+      彼此不重叠的时段（例如一整个空闲下午可以给出 11点、12点 两个）
+    - 建议的开始时间对齐到 step（默认半小时）
+
+    做法是先排序合并 busy，再按天扫描空闲区间，复杂度 O(k log k)，
+    k 为日程数量，不会按小时逐个试探。
+    """
+    if count <= 0 or duration <= timedelta(0):
+        return []
+
+    merged = merge_intervals(busy)
+    starts = [s for s, _ in merged]
+    first_day: date = desired_start.date()
+
+    # 补充建议之间至少隔一个 duration（向上取整到 step），避免互相重叠
+    stride = -(-duration // step)
+
+    primary: List[Tuple[float, datetime, datetime]] = []
+    extras: List[Tuple[float, datetime, datetime]] = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        win_start = datetime(day.year, day.month, day.day, work_start_hour)
+        win_end = datetime(day.year, day.month, day.day, work_end_hour)
+
+        for gap_start, gap_end in _free_gaps(merged, starts, win_start, win_end):
+            # 区间里可用的开始时间都对齐到 step：earliest + k*step，k = 0..last
+            earliest = _align_up(gap_start, step)
+            if earliest + duration > gap_end:
+                continue
+            last = (gap_end - duration - earliest) // step
+            latest = earliest + last * step
+            # 取离 desired_start 最近的对齐时间（四舍五入，而不是向下取整）
+            target = min(max(desired_start, earliest), latest)
+            q, r = divmod(target - earliest, step)
+            if r * 2 >= step:
+                q += 1
+            q = min(q, last)
+            primary.append(_candidate(earliest + q * step, duration, desired_start))
+
+            # 同一区间里往两边各取最多 count 个，作为不够时的补充
+            for m in range(1, count + 1):
+                for k in (q - m * stride, q + m * stride):
+                    if 0 <= k <= last:
+                        extras.append(_candidate(earliest + k * step, duration, desired_start))
+
+    best = heapq.nsmallest(count, primary)
+    if len(best) < count:
+        best += heapq.nsmallest(count - len(best), extras)
+    best.sort()
+    return [(s, e) for _, s, e in best]
+
+
+def _candidate(start: datetime, duration: timedelta, desired_start: datetime):
+    return abs((start - desired_start).total_seconds()), start, start + duration
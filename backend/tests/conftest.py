@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import os
+import sys
+
+# backend 下的模块都是平铺 import（from logger import logger），测试时把 backend 加进路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
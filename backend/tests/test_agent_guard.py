@@ -0,0 +1,82 @@
+# backend/tests/test_agent_guard.py
+import asyncio
+
+import pytest
+
+from agent_guard import AgentBusyError, AgentGuard, CircuitBreaker, CircuitOpenError
+
+
+def make_breaker(**kwargs):
+    params = dict(window=4, min_calls=2, failure_rate=0.5, slow_call_seconds=10, open_seconds=0)
+    params.update(kwargs)
+    return CircuitBreaker(**params)
+
+
+def test_opens_after_failure_rate_reached():
+    breaker = make_breaker(open_seconds=30)
+    for _ in range(2):
+        breaker.record(breaker.before_call(), True, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_stale_result_does_not_settle_half_open_trial():
+    breaker = make_breaker()
+    # 熔断前就在跑的调用
+    stale = breaker.before_call()
+    for _ in range(2):
+        breaker.record(breaker.before_call(), True, 0.1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    trial = breaker.before_call()
+    # 旧调用这时才成功返回：不能关闭熔断，也不能放出第二个试探
+    breaker.record(stale, False, 0.1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record(trial, False, 0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_trial_reopens():
+    breaker = make_breaker(open_seconds=30)
+    for _ in range(2):
+        breaker.record(breaker.before_call(), True, 0.1)
+    breaker.open_seconds = 0
+    trial = breaker.before_call()
+    breaker.open_seconds = 30
+    breaker.record(trial, True, 0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_guard_times_out_hung_call_and_frees_slot():
+    async def main():
+        guard = AgentGuard(make_breaker(slow_call_seconds=0.05, min_calls=1, open_seconds=30),
+                           max_concurrency=1, max_queue=1)
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await guard.run(hang)
+        assert not guard._semaphore.locked()
+        assert guard.breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(main())
+
+
+def test_guard_rejects_when_queue_full():
+    async def main():
+        guard = AgentGuard(make_breaker(), max_concurrency=1, max_queue=1)
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return 1
+
+        return await asyncio.gather(*(guard.run(slow) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert results[:2] == [1, 1]
+    assert isinstance(results[2], AgentBusyError)
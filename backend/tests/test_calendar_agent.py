@@ -0,0 +1,20 @@
+# backend/tests/test_calendar_agent.py
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from calendar_agent import parse_event_label_range  # noqa: E402
+
+DAY = datetime(2026, 1, 1)
+
+
+@pytest.mark.parametrize("label, expected", [
+    ("上午10點至上午11點，和公司CEO會議", (DAY.replace(hour=10), DAY.replace(hour=11))),
+    ("下午2:30 – 3:30，x", (DAY.replace(hour=14, minute=30), DAY.replace(hour=15, minute=30))),
+    ("下午11點至上午12點，夜宵", (DAY.replace(hour=23), DAY.replace(hour=23, minute=59))),
+    ("23:00 到 24:00", (DAY.replace(hour=23), DAY.replace(hour=23, minute=59))),
+])
+def test_parse_event_label_range(label, expected):
+    assert parse_event_label_range(label, DAY) == expected
@@ -0,0 +1,40 @@
+# backend/tests/test_nlp_parser.py
+from datetime import datetime
+
+import pytest
+
+from nlp_parser import parse_many, parse_slot_choice
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("第一个", 0),
+    ("第 2 个。", 1),
+    ("第三個！", 2),
+    ("就第一个", 0),
+    ("选第二个", 1),
+    ("第一个吧", 0),
+    ("我要第三个好了", 2),
+])
+def test_parse_slot_choice(text, expected):
+    assert parse_slot_choice(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "明天第二节课十点到十一点",
+    "好的",
+    "第零个",
+    "",
+])
+def test_parse_slot_choice_rejects_non_choices(text):
+    assert parse_slot_choice(text) is None
+
+
+def test_parse_many_uses_reference_time():
+    ref = datetime(2025, 1, 1, 9)
+    results = list(parse_many(["明天上午十点到十一点，和公司CEO会议。", "你好"], ref, workers=1))
+    assert results[0] == {
+        "start": datetime(2025, 1, 2, 10),
+        "end": datetime(2025, 1, 2, 11),
+        "title": "和公司CEO会议",
+    }
+    assert results[1] is None
@@ -0,0 +1,45 @@
+# backend/tests/test_slot_finder.py
+from datetime import datetime, timedelta
+
+from slot_finder import find_free_slots, merge_intervals
+
+DAY = datetime(2026, 1, 1)
+HOUR = timedelta(hours=1)
+
+
+def at(hour, minute=0):
+    return DAY.replace(hour=hour, minute=minute)
+
+
+def test_merge_intervals_merges_overlapping_and_touching():
+    busy = [(at(13), at(14)), (at(10), at(11)), (at(10, 30), at(12)), (at(12), at(12, 30))]
+    assert merge_intervals(busy) == [(at(10), at(12, 30)), (at(13), at(14))]
+
+
+def test_rounds_to_nearest_step_not_down():
+    # 10:50 想要 1 小时：11:00 只差 10 分钟，比 10:30 更近
+    slots = find_free_slots([(at(9), at(10, 20))], at(10, 50), HOUR, count=1)
+    assert slots == [(at(11), at(12))]
+
+
+def test_returns_count_slots_when_fewer_gaps_than_count():
+    # 10-11 冲突、其余全空：只有两个空闲区间，仍然要给满 3 个且互不重叠
+    slots = find_free_slots([(at(10), at(11))], at(10), HOUR, count=3)
+    assert slots == [(at(9), at(10)), (at(11), at(12)), (at(12), at(13))]
+
+
+def test_prefers_one_slot_per_gap():
+    busy = [(at(10), at(11)), (at(12), at(13)), (at(14), at(15))]
+    slots = find_free_slots(busy, at(10), HOUR, count=3)
+    assert slots == [(at(9), at(10)), (at(11), at(12)), (at(13), at(14))]
+
+
+def test_stays_within_working_hours():
+    slots = find_free_slots([(at(9), at(17, 30))], at(17), HOUR, count=3)
+    assert slots == []
+
+
+def test_searches_following_days():
+    busy = [(at(9), at(18))]
+    slots = find_free_slots(busy, at(10), HOUR, count=1, days=2)
+    assert slots == [(at(9) + timedelta(days=1), at(10) + timedelta(days=1))]
@@ -1,20 +1,79 @@
 # backend/voice_bot.py
 from datetime import datetime
-from typing import Optional, Dict, Any
-from nlp_parser import parse_schedule_from_text
+from typing import Optional, Dict, Any, List, Tuple
+from nlp_parser import parse_schedule_from_text, parse_slot_choice
 #from AI_nlp_parser import parse_schedule_from_text
-from calendar_agent import create_event_with_conflict_check
+from calendar_agent import (
+    create_event_with_conflict_check, create_event_on_open_page, close_open_session,
+)
+from slot_finder import find_free_slots
+from agent_guard import AgentUnavailableError
+from replies import FIXED_REPLIES
+from config import WORK_START_HOUR, WORK_END_HOUR, FREE_SLOT_SUGGESTIONS
 from logger import logger
 
-welcome_text = "您好，我是您的日程助手，你要记录什么日程？"
+welcome_text = FIXED_REPLIES["welcome"]
 
 # 简单全局状态（正式可以用 session / redis）
 state = {
     "pending_event": None,
     "waiting_new_time": False,
-    
+    "suggested_slots": [],
 }
 
+CN_ORDINAL = ["一", "二", "三", "四", "五", "六", "七", "八", "九", "十"]
+
+
+def _fmt_time(dt: datetime) -> str:
+    """10:00 -> '10点'，10:30 -> '10点30分'"""
+    if dt.minute:
+        return f"{dt.hour}点{dt.minute}分"
+    return f"{dt.hour}点"
+
+
+def _fmt_slots(slots: List[Tuple[datetime, datetime]]) -> str:
+    parts = []
+    for i, (s, e) in enumerate(slots):
+        ordinal = CN_ORDINAL[i] if i < len(CN_ORDINAL) else str(i + 1)
+        parts.append(f"第{ordinal}个，{_fmt_time(s)}到{_fmt_time(e)}")
+    return "；".join(parts)
+
+
+def _clear_suggestions():
+    state["suggested_slots"] = []
+    state["pending_event"] = None
+    state["waiting_new_time"] = False
+
+
+async def _handle_slot_choice(index: int) -> str:
+    """用户从建议时段里选了一个，直接在已打开的页面上创建。"""
+    slots = state["suggested_slots"]
+    pending = state["pending_event"]
+    if index >= len(slots) or pending is None:
+        return f"只有{len(slots)}个可选时段，请说第几个，或者说一个新的时间。"
+
+    start, end = slots[index]
+    title = pending["title"]
+    logger.info(f"[BOT] user picked slot #{index + 1}: {start} - {end}, title={title!r}")
+
+    try:
+        created, conflict_info, busy = await create_event_on_open_page(start, end, title)
+    except AgentUnavailableError:
+        # 熔断 / 排队满时请求还没被受理、页面也没动过：
+        # 保留建议和已打开的页面，用户稍后再说“第一个”就行（页面闲置超时会自动关闭）
+        raise
+    except Exception as e:
+        _clear_suggestions()
+        logger.error("[BOT] calendar agent exception", exc_info=True)
+        print("Error in calendar agent:", e)
+        return FIXED_REPLIES["calendar_error"]
+    _clear_suggestions()
+    if not created:
+        # 保留的页面已经闲置关闭、退回完整流程时，这个时段可能已被占用：
+        # 照常回报冲突并重新给出建议
+        return _conflict_reply({"start": start, "end": end, "title": title}, conflict_info, busy)
+    return f"好的，已经在 {start.month}月{start.day}日 {_fmt_time(start)} 到 {_fmt_time(end)} 为您创建日程：{title}。"
+
 async def handle_user_message(text: str) -> str:
     logger.info(f"[BOT] raw user text = {text!r}")
     global state
@@ -23,11 +82,21 @@ async def handle_user_message(text: str) -> str:
     #     state["greeted"] = True
     #     return "您好，我是您的日程助手，請問需要記錄什麼日程？"
     
+    # 上一轮有冲突并给出了建议时段：用户说“第一个”时直接创建
+    if state["suggested_slots"]:
+        choice = parse_slot_choice(text)
+        if choice is not None:
+            return await _handle_slot_choice(choice)
+        # 用户没有选建议时段，放弃建议，同时关掉保留的浏览器
+        state["suggested_slots"] = []
+        state["pending_event"] = None
+        await close_open_session()
+
     # 第一步：解析日程
     event = parse_schedule_from_text(text)
     if event is None:
             logger.info("[BOT] NLP failed on first try")
-            return "我没有听清楚具体的时间或标题，请再说一遍，例如：明天上午十点到十一点，和公司CEO会议。"
+            return FIXED_REPLIES["nlp_failed"]
     start = event["start"]
     end = event["end"]
     title = event["title"]
@@ -39,20 +108,49 @@ async def handle_user_message(text: str) -> str:
 
     # 调用 Playwright Agent 检查冲突并创建日程
     try:
-        created, conflict_info = await create_event_with_conflict_check(start, end, title)
+        created, conflict_info, busy = await create_event_with_conflict_check(start, end, title)
+    except AgentUnavailableError:
+        # 熔断 / 排队满：交给 HTTP 层回 503 / 429 + Retry-After
+        raise
     except Exception as e:
         logger.error("[BOT] calendar agent exception", exc_info=True)
         print("Error in calendar agent:", e)
-        return "在操作谷歌日历时发生错误，请稍后再试。"
+        return FIXED_REPLIES["calendar_error"]
 
     if created:
         date_str = f"{start.month}月{start.day}日 {start.hour}点"
         end_str = f"{end.hour}点"
         return f"好的，已经在 {date_str} 到 {end_str} 为您创建日程：{title}。"
 
-    # 有冲突
+    return _conflict_reply(event, conflict_info, busy)
+
+
+def _conflict_reply(event: Dict, conflict_info: str,
+                    busy: List[Tuple[datetime, datetime]]) -> str:
+    """有冲突：记下待建日程，算出当天可用时段，一起回复。"""
+    start = event["start"]
+    end = event["end"]
     logger.info(f"[BOT] conflict: {conflict_info}")
     state["waiting_new_time"] = True
-    date_str = f"{start.month}月{start.day}日 {start.hour}点"
-    end_str = f"{end.hour}点"
-    return f"您在 {date_str} 到 {end_str} 已有日程安排：{conflict_info}，请说一个新的时间。"
+    date_str = f"{start.month}月{start.day}日 {_fmt_time(start)}"
+    end_str = _fmt_time(end)
+
+    # 没抓到当天日程（或是内部错误）时不给建议，避免建议出同样冲突的时间
+    slots = find_free_slots(
+        busy + [(start, end)],
+        start,
+        end - start,
+        count=FREE_SLOT_SUGGESTIONS,
+        work_start_hour=WORK_START_HOUR,
+        work_end_hour=WORK_END_HOUR,
+    ) if busy else []
+    state["pending_event"] = event
+    state["suggested_slots"] = slots
+    if not slots:
+        return f"您在 {date_str} 到 {end_str} 已有日程安排：{conflict_info}，请说一个新的时间。"
+
+    logger.info(f"[BOT] suggested slots: {slots}")
+    return (
+        f"您在 {date_str} 到 {end_str} 已有日程安排：{conflict_info}。"
+        f"当天可用的时间有：{_fmt_slots(slots)}。请说第几个，或者说一个新的时间。"
+    )